@@ -0,0 +1,217 @@
+from collections.abc import Callable
+from functools import cache
+
+import click
+from langchain_core.messages import BaseMessage, ChatMessage
+from loguru import logger
+
+from consul.cli.utils.commands import Commands
+from consul.cli.utils.save import save_memory
+from consul.cli.utils.text import TerminalHandler
+from consul.cli.utils.user_args import UserArgs
+from consul.core.config.flows import AvailableFlow
+from consul.flows.agents.react import ReactAgentFlow
+from consul.flows.base import BaseFlow
+from consul.flows.tasks.chat import ChatTask
+
+FLOWS: dict[str, Callable[[], BaseFlow]] = {
+    "chat": lambda: ChatTask(AvailableFlow.CHAT),
+    "coder": lambda: ReactAgentFlow(AvailableFlow.CODER),
+    "tester": lambda: ReactAgentFlow(AvailableFlow.TESTER),
+}
+_FLOWS_LIST_STR = ", ".join(FLOWS)
+
+# number of history messages sent to the flow, the window grows up to twice the size before it's moved forward
+HISTORY_WINDOW_SIZE = 50
+
+
+@cache
+def _get_flow(name: str) -> BaseFlow:
+    """Instantiate flow on its first use, following calls return the same instance."""
+    return FLOWS[name]()
+
+
+@cache
+def _get_flow_banner(name: str) -> str:
+    """Build wrapped startup message of the flow once, following calls return the same text."""
+    config = _get_flow(name).config
+    return TerminalHandler.apply_smart_text_wrap(
+        f"Starting '{config.name}' flow, ver: {config.version}; {config.description}"
+    )
+
+
+def configure_logging(user_args: UserArgs) -> None:
+    """Route loguru messages into the terminal handler with log level given by user arguments."""
+    if user_args.quiet:
+        level = "WARNING"
+    elif user_args.verbose:
+        level = "DEBUG"
+    else:
+        level = "INFO"
+
+    logger.remove()
+    logger.add(TerminalHandler.display_loguru_message, level=level, format="{message}")
+
+
+def _is_user_message(message: BaseMessage) -> bool:
+    return isinstance(message, ChatMessage) and message.role == "user"
+
+
+class CommandInterrupt(BaseException):
+    """Runtime interrupt from user command."""
+
+
+class ConsulInterface:
+    """Class representing flow of the consul cli interface."""
+
+    __slots__ = ("_active_flow", "_chat_history", "_commands", "_user_args", "_window_start")
+
+    _active_flow: BaseFlow
+    _chat_history: list[BaseMessage]
+    _commands: Commands
+    _user_args: UserArgs
+    _window_start: int
+
+    def __init__(self, user_args: UserArgs) -> None:
+        """Setup console interface state."""
+        # setup variables
+        self._user_args = user_args
+        self._chat_history: list[BaseMessage] = []
+        self._window_start = 0
+        self._commands: Commands = Commands()
+
+    def start_interface(self) -> None:
+        # Welcome message
+        TerminalHandler.echo_intro(FLOWS.keys())
+
+        # initiate first flow
+        self._init_llm_flow(self._user_args.flow)
+
+        # start main loop
+        try:
+            self._main_loop()
+
+        # handle exit program via keyboard or command interruption
+        except (KeyboardInterrupt, CommandInterrupt):
+            pass
+
+        # handle unexpected exceptions
+        except Exception as e:
+            logger.exception(f"Unexpected error in {self._user_args.flow} flow: {e!s}")
+            raise click.ClickException(str(e)) from e
+
+        # cleanup
+        finally:
+            TerminalHandler.echo_goodbye()
+            TerminalHandler.stop_spinner()
+            TerminalHandler.stop_log_listener()
+
+    def _main_loop(self) -> None:
+        while True:
+            # Get user input
+            try:
+                if not self._user_args.message:
+                    user_input = TerminalHandler.prompt_user_input()
+                else:
+                    TerminalHandler.display_message(f"User: {self._user_args.message}")
+                    user_input = self._user_args.message
+                    self._user_args.message = ""  # reset message to avoid infinite loop
+            except click.Abort:
+                # Handle Ctrl+C gracefully
+                return
+
+            # Only leading whitespace matters for both checks below
+            stripped_input = user_input.lstrip()
+
+            # Check for command
+            if stripped_input[:1] == "/":
+                system_reply = self._handle_user_command(stripped_input)
+                TerminalHandler.display_message(f"Command:{system_reply}")
+                continue
+
+            # Skip empty inputs
+            if not stripped_input:
+                TerminalHandler.display_message("Command:Please enter a message")
+                continue
+
+            # Run the flow
+            TerminalHandler.start_spinner()
+
+            # prepare history and call the flow
+            # user input is always a string, so the message validation can be skipped
+            user_message = ChatMessage.model_construct(role="user", content=user_input)
+            self._chat_history.append(user_message)
+            self._update_history_window()
+            try:
+                # response is displayed while it's being generated
+                result = self._active_flow.execute_stream(
+                    {"messages": self._chat_history[self._window_start :]},
+                    on_token=TerminalHandler.stream_message,
+                    on_message_end=TerminalHandler.end_stream_message,
+                )
+            finally:
+                streamed = TerminalHandler.end_stream()
+
+            # Process response
+            assistant_message = result.messages[-1]
+            self._chat_history.extend(result.new_messages)
+
+            # Display response if the model didn't stream it
+            TerminalHandler.stop_spinner()
+            if not streamed:
+                TerminalHandler.display_message(f"Assistant:{assistant_message.content}", format_markdown=True)
+
+    def _update_history_window(self) -> None:
+        """
+        Move start of the history window sent to the flow once it exceeds twice the window size. The window is kept
+        between the moves, so the flow sees the same message prefix across turns, and it always starts with a user
+        message, so no tool response is separated from its tool call.
+        """
+        history_len = len(self._chat_history)
+        if history_len - self._window_start <= 2 * HISTORY_WINDOW_SIZE:
+            return
+
+        window_start = history_len - HISTORY_WINDOW_SIZE
+        while window_start < history_len - 1 and not _is_user_message(self._chat_history[window_start]):
+            window_start += 1
+        self._window_start = window_start
+
+    def _clear_history(self) -> None:
+        self._chat_history.clear()
+        self._window_start = 0
+
+    def _init_llm_flow(self, flow: str) -> None:
+        # Fall back to the default flow, only the selected flow gets instantiated
+        if flow not in FLOWS:
+            logger.warning("Flow '{}' not in available flows ({}). Starting default flow.", flow, _FLOWS_LIST_STR)
+            flow = "chat"
+
+        # Change the active flow
+        self._active_flow = _get_flow(flow)
+
+        # Inform the user
+        TerminalHandler.display_message(_get_flow_banner(flow))
+
+    def _handle_user_command(self, command: str) -> str:
+        """Private method for handling user commands starting with '/' character."""
+        # split command, only the short command tokens are normalized
+        order, _, info = command.partition(" ")
+        order = order.rstrip().lower()
+        info = info.strip().lower()
+        # Exit app
+        if order in self._commands.EXIT:
+            raise CommandInterrupt
+        # clear chat history
+        if order in self._commands.RESET:
+            self._clear_history()
+            return "Memory cleared!"
+        # change used flow
+        if order in self._commands.FLOW:
+            self._init_llm_flow(info)
+            self._clear_history()
+            return f"Flow changed to {self._active_flow.config.name} and memory cleared."
+        # save data to markdown
+        if order in self._commands.SAVE:
+            path_to_saved_file = save_memory(self._chat_history, self._active_flow.config.name)
+            return f"Conversation history saved at '{path_to_saved_file}'"
+        return "Unknown command!"
@@ -1,17 +1,18 @@
+from functools import cache
+
 from pydantic import BaseModel, Field
 
 
 class Commands(BaseModel):
-    EXIT: list[str] = Field(default=["/q"], description="exit the application")
-    SAVE: list[str] = Field(default=["/s"], description="save conversation history to markdown")
-    RESET: list[str] = Field(default=["/r"], description="reset conversation history")
-    FLOW: list[str] = Field(default=["/f"], description="change used flow and clear history")
+    EXIT: frozenset[str] = Field(default=frozenset({"/q"}), description="exit the application")
+    SAVE: frozenset[str] = Field(default=frozenset({"/s"}), description="save conversation history to markdown")
+    RESET: frozenset[str] = Field(default=frozenset({"/r"}), description="reset conversation history")
+    FLOW: frozenset[str] = Field(default=frozenset({"/f"}), description="change used flow and clear history")
 
     @classmethod
+    @cache
     def get_instructions(cls) -> str:
+        """Human readable instructions for all commands, built once from the model fields."""
         return "; ".join(
-            [
-                f"To {cls.model_fields[command].description} write: {', '.join(cls.__pydantic_fields__[command].default)}"
-                for command in cls.model_fields
-            ]
+            [f"To {field.description} write: {', '.join(sorted(field.default))}" for field in cls.model_fields.values()]
         )
@@ -1,10 +1,16 @@
-import json
+import io
+from collections.abc import Callable
 from datetime import datetime
+from functools import cache
 from pathlib import Path
 
+import orjson
 from langchain_core.messages import AIMessage, BaseMessage, ChatMessage, ToolMessage
 from loguru import logger
 
+# sortable and filesystem safe timestamp used in names of saved files
+_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
 
 def _save_to_markdown(path: str, content: str) -> None:
     """Saves the content to a markdown, creating directories if needed."""
@@ -13,15 +19,22 @@ def _save_to_markdown(path: str, content: str) -> None:
 
     # Create parent folders if they don't exist
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    if file_path.exists():
+    # Exclusive create ("x") checks for an existing file and creates the new one atomically
+    try:
+        file = file_path.open("x", encoding="utf-8")
+    except FileExistsError:
         msg = f"File already exists: {file_path}"
         logger.error(msg)
-        raise FileExistsError(msg)
-    file_path.write_text(content, encoding="utf-8")
+        raise FileExistsError(msg) from None
+    with file:
+        file.write(content)
 
 
-def _truncate_strings(obj: dict | list | str, max_length: str = 500) -> dict | list | str:
+def _truncate_strings(obj: dict | list | str, max_length: int = 500) -> dict | list | str:
     """Limiter for output size."""
+    # string representation is never shorter than any string inside, so small containers can be returned as they are
+    if isinstance(obj, dict | list) and len(str(obj)) <= max_length:
+        return obj
     if isinstance(obj, dict):
         return {k: _truncate_strings(v, max_length) for k, v in obj.items()}
     if isinstance(obj, list):
@@ -40,11 +53,11 @@ def _process_aimessage(turn: AIMessage, idx: int) -> str:
     if turn.content:
         out.append(f"→ {turn.content}")
     # load tool calls
-    if "tool_calls" in turn.additional_kwargs:
-        truncated = _truncate_strings(turn.additional_kwargs["tool_calls"])
+    if tool_calls := turn.additional_kwargs.get("tool_calls"):
+        truncated = _truncate_strings(tool_calls)
         out.append("\n\nAssistant tool calls:")
         out.append("```json")
-        out.append(json.dumps(truncated, indent=4))
+        out.append(orjson.dumps(truncated, option=orjson.OPT_INDENT_2).decode())
         out.append("```")
     # load token usage
     if turn.usage_metadata:
@@ -61,7 +74,9 @@ def _process_toolmessage(turn: ToolMessage, idx: int) -> str:
     truncated = _truncate_strings(turn.model_dump(include=keys_order))
     # dump ordered dict
     out.append("```json")
-    out.append(json.dumps({k: truncated[k] for k in keys_order if k in truncated}, indent=4))
+    out.append(
+        orjson.dumps({k: truncated[k] for k in keys_order if k in truncated}, option=orjson.OPT_INDENT_2).decode()
+    )
     out.append("```")
     return "\n".join(out)
 
@@ -69,26 +84,43 @@ def _process_toolmessage(turn: ToolMessage, idx: int) -> str:
 def _process_chatmessage(turn: ChatMessage, idx: int) -> str:
     """Convert content of ChatMessage into a markdown string."""
     out = [f"## {idx}) User:\n\n→ ", turn.content]
-    if hasattr(turn, "token_usage"):
-        out.append(f"Tokens used: {turn.token_usage}")
+    if token_usage := turn.response_metadata.get("token_usage"):
+        out.append(f"Tokens used: {token_usage}")
     return "\n".join(out)
 
 
+# markdown converters for supported message types
+_MESSAGE_PROCESSORS: dict[type[BaseMessage], Callable[..., str]] = {
+    AIMessage: _process_aimessage,
+    ToolMessage: _process_toolmessage,
+    ChatMessage: _process_chatmessage,
+}
+
+
+@cache
+def _get_message_processor(message_type: type[BaseMessage]) -> Callable[..., str] | None:
+    """Get markdown converter for given message type, subclasses (e.g. AIMessageChunk) use the converter of parent."""
+    for cls in message_type.__mro__:
+        if cls in _MESSAGE_PROCESSORS:
+            return _MESSAGE_PROCESSORS[cls]
+    return None
+
+
 def save_memory(history: list[BaseMessage], flow_name: str) -> str:
     """Save conversation history into a markdown file."""
-    # process the history
-    text_to_save: list[str] = []
+    # process the history, sections are written into a single buffer
+    text_to_save = io.StringIO()
+    separator = ""
     for idx, turn in enumerate(history):
-        turn_id = idx + 1
-        if isinstance(turn, AIMessage):
-            text_to_save.append(_process_aimessage(turn, turn_id))
-        elif isinstance(turn, ToolMessage):
-            text_to_save.append(_process_toolmessage(turn, turn_id))
-        elif isinstance(turn, ChatMessage):
-            text_to_save.append(_process_chatmessage(turn, turn_id))
+        process_message = _get_message_processor(type(turn))
+        if process_message is None:
+            continue
+        text_to_save.write(separator)
+        text_to_save.write(process_message(turn, idx + 1))
+        separator = "\n\n---\n\n"
     # finalize and save
-    final_text = "\n\n---\n\n".join(text_to_save)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  # noqa: DTZ005
+    final_text = text_to_save.getvalue()
+    timestamp = datetime.now().strftime(_TIMESTAMP_FORMAT)  # noqa: DTZ005
     file_path = f"consul_{flow_name}_{timestamp}.md"
     _save_to_markdown(file_path, final_text)
     return file_path
@@ -1,56 +1,128 @@
+import atexit
+import queue
 import re
+import sys
 import textwrap
+import threading
+from functools import cache, lru_cache
 from typing import TYPE_CHECKING, Any
 
-from prompt_toolkit import prompt
 from rich.console import Console
-from rich.live import Live
-from rich.markdown import Markdown
-from rich.spinner import Spinner
 from rich.text import Text
-from rich.traceback import Traceback
 
 from consul.cli.utils.commands import Commands
 
 if TYPE_CHECKING:
     import loguru
+    from prompt_toolkit import PromptSession
+    from rich.live import Live
+    from rich.markdown import Markdown
+    from rich.spinner import Spinner
 
 MAX_WIDTH = 120
 MIN_WIDTH = 66
 
-
+# pattern of list items used by the smart text wrap
+_LIST_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d+\.)\s+")
+# first characters of list items, other lines skip the list item pattern
+_LIST_MARKER_CHARS = frozenset("-*+0123456789")
+
+# maximum number of log records written to the console at once by the log listener
+LOG_BATCH_SIZE = 64
+
+LOG_LEVEL_COLORS = {
+    "DEBUG": "blue",
+    "INFO": "white",
+    "SUCCESS": "green",
+    "WARNING": "yellow",
+    "ERROR": "red",
+    "CRITICAL": "red",
+}
+# styled "→ [LEVEL] " prefixes, copied for each log record instead of being styled again
+LOG_LEVEL_PREFIXES = {
+    level: Text.assemble(("→ ", "white"), (f"[{level}] ", color)) for level, color in LOG_LEVEL_COLORS.items()
+}
+
+# styled prefixes of displayed messages
+MESSAGE_PREFIXES = {
+    prefix: Text.assemble((prefix, color), ("\n→ ", "white"))
+    for prefix, color in {"User:": "blue", "Assistant:": "green", "Command:": "red"}.items()
+}
+# label printed above the input prompt
+USER_PROMPT_LABEL = Text("User:", style="blue")
+
+
+@cache
+def _get_text_wrapper(subsequent_indent: str) -> textwrap.TextWrapper:
+    """
+    Get text wrapper for given indent of the wrapped lines, wrappers are created once and reused. Lines are broken only
+    on whitespace, which lets the wrapper split words with a much simpler pattern.
+    """
+    return textwrap.TextWrapper(width=MAX_WIDTH, subsequent_indent=subsequent_indent, break_on_hyphens=False)
+
+
+@lru_cache(maxsize=1024)
+def _wrap_long_line(line: str) -> str:
+    """Wrap single line longer than MAX_WIDTH, results are cached as the same lines repeat across displayed messages."""
+    # Detect list items and their indentation
+    stripped_line = line.lstrip()
+    list_match = _LIST_ITEM_RE.match(line) if stripped_line[:1] in _LIST_MARKER_CHARS else None
+    if list_match:
+        indent = list_match.group(1)
+        marker = list_match.group(2)
+        hanging_indent = len(indent) + len(marker) + 1
+        return _get_text_wrapper(" " * hanging_indent).fill(line)
+
+    leading_space = line[: len(line) - len(stripped_line)]
+    return _get_text_wrapper(leading_space).fill(line)
+
+
+def _render_markdown(text: str) -> "Markdown":
+    """Markdown renderable of the text, heavy markdown and syntax highlighting modules are imported on first use."""
+    from rich.markdown import Markdown  # noqa: PLC0415
+
+    return Markdown(text, code_theme="lightbulb")
+
+
+@cache
 def get_ascii_art_logo(console_width: int) -> Text:
-    """Generate ASCII art logo scaled to console width."""
+    """Generate ASCII art logo scaled to console width, the logo is built once per width."""
     char_scale = max(0, int((console_width - MIN_WIDTH) / 2))
+    shade_pad = "░" * char_scale
+    space_pad = " " * char_scale
 
     logo_lines = [
         "",
-        f"{'░' * char_scale}░   █████████   ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░   ████   {'░' * char_scale}",
-        f"{' ' * char_scale}   ███░░░░░███                                            ░░███",
-        f"{' ' * char_scale}  ███     ░░░    ██████   ████████     █████   █████ ████  ░███",
-        f"{' ' * char_scale} ░███           ███░░███ ░░███░░███   ███░░   ░░███ ░███   ░███",
-        f"{' ' * char_scale} ░███          ░███ ░███  ░███ ░███  ░░█████   ░███ ░███   ░███",
-        f"{' ' * char_scale} ░░███     ███ ░███ ░███  ░███ ░███   ░░░░███  ░███ ░███   ░███",
-        f"{' ' * char_scale}  ░░█████████  ░░██████   ████ █████  ██████   ░░████████  █████",
-        f"{'░' * char_scale}   ░░░░░░░░░    ░░░░░░   ░░░░ ░░░░░  ░░░░░░     ░░░░░░░░  ░░░░░   {'░' * char_scale}",
+        f"{shade_pad}░   █████████   ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░   ████   {shade_pad}",
+        f"{space_pad}   ███░░░░░███                                            ░░███",
+        f"{space_pad}  ███     ░░░    ██████   ████████     █████   █████ ████  ░███",
+        f"{space_pad} ░███           ███░░███ ░░███░░███   ███░░   ░░███ ░███   ░███",
+        f"{space_pad} ░███          ░███ ░███  ░███ ░███  ░░█████   ░███ ░███   ░███",
+        f"{space_pad} ░░███     ███ ░███ ░███  ░███ ░███   ░░░░███  ░███ ░███   ░███",
+        f"{space_pad}  ░░█████████  ░░██████   ████ █████  ██████   ░░████████  █████",
+        f"{shade_pad}   ░░░░░░░░░    ░░░░░░   ░░░░ ░░░░░  ░░░░░░     ░░░░░░░░  ░░░░░   {shade_pad}",
         "",
     ]
 
-    logo_text = Text()
-    for line in logo_lines:
-        logo_text.append(line + "\n", style="cyan")
-
-    return logo_text
+    return Text("\n".join(logo_lines) + "\n", style="cyan")
 
 
 class TerminalHandler:
     """Singleton class for all terminal I/O operations in Consul. Use only classmethods; do not instantiate."""
 
     _console: Console | None = None
-    _live_spinner: Live | None = None
-    _spinner: Spinner | None = None
+    _live_spinner: "Live | None" = None
+    _spinner: "Spinner | None" = None
+    _spinner_running: bool = False
     _main_col: str = "cyan"
     _use_colors: bool = True
+    _log_queue: queue.Queue[dict[str, Any] | None] = queue.Queue()
+    _log_listener: threading.Thread | None = None
+    _log_lock: threading.Lock = threading.Lock()
+    _stream_buffer: str = ""
+    _stream_started: bool = False
+    _stream_rendered: bool = False
+    _prompt_session: "PromptSession[str] | None" = None
 
     def __new__(cls) -> None:
         """Prevent instantiation of TerminalHandler."""
@@ -70,15 +142,18 @@ class TerminalHandler:
         return cls._console
 
     @classmethod
-    def _init_spinner(cls) -> tuple[Live, Spinner]:
-        """Initialize spinner components."""
+    def _init_spinner(cls) -> tuple["Live", "Spinner"]:
+        """Initialize spinner components, Rich live display modules are imported on first use."""
         if cls._live_spinner is None or cls._spinner is None:
+            from rich.live import Live  # noqa: PLC0415
+            from rich.spinner import Spinner  # noqa: PLC0415
+
             spinner_text = Text("Consuliting artificial neurons...", style=cls._main_col)
             cls._spinner = Spinner("arrow", text=spinner_text, style=cls._main_col)
             cls._live_spinner = Live(
                 cls._spinner,
                 console=cls._init_console(),
-                refresh_per_second=10,
+                refresh_per_second=5,  # low refresh rate keeps the render thread mostly idle while waiting for LLM
                 transient=True,  # Make spinner transient so it disappears when stopped
             )
         return cls._live_spinner, cls._spinner
@@ -86,14 +161,19 @@ class TerminalHandler:
     @classmethod
     def start_spinner(cls) -> None:
         """Start Rich spinner in the terminal."""
+        if cls._spinner_running:
+            return
         live_spinner, _ = cls._init_spinner()
-        if not live_spinner.is_started:
-            live_spinner.start()
+        live_spinner.start()
+        cls._spinner_running = True
 
     @classmethod
     def stop_spinner(cls) -> None:
         """Stop Rich spinner in the terminal."""
-        if cls._live_spinner and cls._live_spinner.is_started:
+        if not cls._spinner_running:
+            return
+        cls._spinner_running = False
+        if cls._live_spinner is not None:
             cls._live_spinner.stop()
             cls._live_spinner = None
             cls._spinner = None
@@ -101,81 +181,136 @@ class TerminalHandler:
     @classmethod
     def display_loguru_message(cls, message: "loguru.Message") -> None:
         """
-        Logging handler which echoes loguru logger messages into Rich console while keeping its formatting
-        and safely handling the spinner instance.
+        Logging handler which hands loguru logger messages over to the log listener thread. Formatting and writing
+        into the Rich console happens in the listener, so the logging thread only pays for a queue put.
         """
+        if cls._log_listener is None:
+            cls.start_log_listener()
+        cls._log_queue.put(message.record)
+
+    @classmethod
+    def start_log_listener(cls) -> None:
+        """Start background thread which drains the log queue into Rich console."""
+        with cls._log_lock:
+            if cls._log_listener is None:
+                cls._log_listener = threading.Thread(target=cls._drain_log_queue, name="consul-logs", daemon=True)
+                cls._log_listener.start()
+
+    @classmethod
+    def stop_log_listener(cls) -> None:
+        """Write all queued log messages and stop the log listener thread."""
+        with cls._log_lock:
+            listener, cls._log_listener = cls._log_listener, None
+        if listener is not None:
+            cls._log_queue.put(None)
+            listener.join()
 
-        def emit_message(record: dict, formatted_text: Text) -> None:
-            """Echo log message (and exception, if any) with log level taken into account."""
-            console = cls._init_console()
-            # Print the main log message
-            console.print(formatted_text)
-            # Print traceback if present
-            if record.get("exception"):
-                exc = record["exception"]
-                tb_renderable = Traceback.from_exception(
-                    exc.type,
-                    exc.value,
-                    exc.traceback,
-                    width=console.size.width,
-                    show_locals=False,
-                    max_frames=10 if cls._use_colors else None,
-                )
-                console.print(tb_renderable)
+    @classmethod
+    def flush_logs(cls) -> None:
+        """Block until all queued log messages are written into Rich console."""
+        if cls._log_listener is not None:
+            cls._log_queue.join()
+
+    @classmethod
+    def _drain_log_queue(cls) -> None:
+        """Log listener loop, waits for a record and writes it together with all other already queued records."""
+        while True:
+            batch = [cls._log_queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(cls._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # None is the stop signal
+            records = [record for record in batch if record is not None]
+            try:
+                cls._emit_log_records(records)
+            except Exception as e:  # noqa: BLE001
+                sys.stderr.write(f"Consul log listener failed to write log messages: {e!r}\n")
+            finally:
+                for _ in batch:
+                    cls._log_queue.task_done()
+
+            if len(records) < len(batch):
+                return
+
+    @classmethod
+    def _emit_log_records(cls, records: list[dict[str, Any]]) -> None:
+        """Echo log messages (and exceptions, if any) with log level taken into account using a single write."""
 
         def format_message(record: dict[str, Any]) -> Text:
             """Format log message according to its level."""
-            log_level_color_map = {
-                "DEBUG": "blue",
-                "INFO": "white",
-                "SUCCESS": "green",
-                "WARNING": "yellow",
-                "ERROR": "red",
-                "CRITICAL": "red",
-            }
-
             level = record["level"].name
             message_text = record["message"]
+            time = record["time"]
+            timestamp = f"{time.hour:02d}:{time.minute:02d}:{time.second:02d} "
 
             if not cls._use_colors:
-                return Text(f"→ [{level}] {record['time'].strftime('%H:%M:%S ')} {message_text}")
+                return Text(f"→ [{level}] {timestamp} {message_text}")
 
-            color = log_level_color_map.get(level, "white")
+            color = LOG_LEVEL_COLORS.get(level, "white")
+            prefix = LOG_LEVEL_PREFIXES.get(level) or Text.assemble(("→ ", "white"), (f"[{level}] ", color))
 
-            formatted = Text()
-            formatted.append("→ ", style="white")
-            formatted.append(f"[{level}] ", style=color)
-            formatted.append(record["time"].strftime("%H:%M:%S "), style="white")
+            formatted = prefix.copy()
+            formatted.append(timestamp, style="white")
             formatted.append(message_text, style=color)
 
             return formatted
 
-        # Format message according to the logger level
-        record = message.record
-        formatted_text = format_message(record)
+        if not records:
+            return
 
-        # Echo message while hiding spinner
-        if cls._live_spinner and cls._live_spinner.is_started:
-            cls._live_spinner.stop()
-            emit_message(record, formatted_text)
-            cls._live_spinner.start()
-        else:
-            emit_message(record, formatted_text)
+        # Console buffer context collects all prints and writes them at once on exit. Active spinner is re-rendered
+        # by Rich below the printed messages.
+        console = cls._init_console()
+        with console:
+            for record in records:
+                console.print(format_message(record))
+                # Print traceback if present
+                if record.get("exception"):
+                    from rich.traceback import Traceback  # noqa: PLC0415
+
+                    exc = record["exception"]
+                    tb_renderable = Traceback.from_exception(
+                        exc.type,
+                        exc.value,
+                        exc.traceback,
+                        width=console.size.width,
+                        show_locals=False,
+                        max_frames=10 if cls._use_colors else None,
+                    )
+                    console.print(tb_renderable)
 
     @classmethod
     def prompt_user_input(cls) -> str:
-        """Get user input with persistent prompt and proper wrapping."""
+        """
+        Get user input with persistent prompt and proper wrapping. Piped input is read at once as a single message and
+        the end of the input is handled as an exit.
+        """
+        cls.flush_logs()
         console = cls._init_console()
-        try:
-            console.print("\n", end="")
-            console.print(Text("User:", style="blue"))
-            user_input = prompt(
+        console.print("\n", USER_PROMPT_LABEL, sep="")
+
+        # piped input, empty read means the input was already consumed
+        if not sys.stdin.isatty():
+            user_input = sys.stdin.read()
+            if not user_input:
+                raise KeyboardInterrupt
+            return user_input
+
+        # session is kept between prompts, so the input history is available for search
+        if cls._prompt_session is None:
+            from prompt_toolkit import PromptSession  # noqa: PLC0415
+
+            cls._prompt_session = PromptSession(
                 "→ ",  # Simple string prompt
-                # mouse_support=True,
                 wrap_lines=True,
                 enable_history_search=True,
                 search_ignore_case=True,
             )
+        try:
+            user_input = cls._prompt_session.prompt()
         except KeyboardInterrupt:
             raise
         except EOFError as e:
@@ -189,16 +324,15 @@ class TerminalHandler:
 
         def extract_and_color_prefix(text: str) -> tuple[Text | None, str]:
             """Extract prefix and return colored prefix + remaining text."""
-            prefixes_colors = {"User:": "blue", "Assistant:": "green", "Command:": "red"}
+            # all prefixes end with the first colon of the message
+            head, separator, remaining_text = text.partition(":")
+            colored_prefix = MESSAGE_PREFIXES.get(head + separator)
+            if colored_prefix is None:
+                return None, text
 
-            for prefix, color in prefixes_colors.items():
-                if text.startswith(prefix):
-                    colored_prefix = Text(prefix, style=color) + Text("\n→ ", style="white")
-                    remaining_text = text[len(prefix) :]
-                    return colored_prefix, remaining_text
-
-            return None, text
+            return colored_prefix, remaining_text
 
+        cls.flush_logs()
         console = cls._init_console()
 
         # Always apply text wrap first
@@ -208,50 +342,103 @@ class TerminalHandler:
         colored_prefix, content = extract_and_color_prefix(message)
 
         # Stop spinner temporarily if running
-        spinner_was_running = cls._live_spinner and cls._live_spinner.is_started
+        spinner_was_running = cls._spinner_running
         if spinner_was_running:
             cls.stop_spinner()
 
         try:
-            console.print("\n", end="")
-            # Print colored prefix if it exists
-            if colored_prefix:
-                console.print(colored_prefix, end="")
-            # Print content (either as markdown or plain text)
-            if format_markdown:
-                md = Markdown(content, code_theme="lightbulb")
-                console.print(md)
-            else:
-                console.print(content)
+            # Buffer the whole message and write it to the terminal at once
+            with console:
+                console.print("\n", end="")
+                # Print colored prefix if it exists
+                if colored_prefix:
+                    console.print(colored_prefix, end="")
+                # Print content (either as markdown or plain text)
+                if format_markdown:
+                    console.print(_render_markdown(content))
+                else:
+                    console.print(content)
 
         finally:
             if spinner_was_running:
                 cls.start_spinner()
 
+    @classmethod
+    def stream_message(cls, token: str) -> None:
+        """
+        Echo assistant message streamed token by token into terminal. Tokens are buffered and each complete paragraph
+        is displayed as markdown once it's finished, paragraphs inside of an unfinished code block are kept until the
+        block is closed.
+        """
+        console = cls._init_console()
+
+        # Replace spinner with the assistant prefix on first token
+        if not cls._stream_started:
+            cls._stream_started = True
+            cls.stop_spinner()
+            cls.flush_logs()
+            console.print("\n", MESSAGE_PREFIXES["Assistant:"], sep="", end="")
+        # Spinner was restarted while the flow was running tools, logs from them go before the next response
+        elif cls._spinner_running:
+            cls.stop_spinner()
+            cls.flush_logs()
+
+        cls._stream_buffer += token
+
+        # Display everything up to the last paragraph break
+        split_at = cls._stream_buffer.rfind("\n\n")
+        if split_at == -1 or cls._stream_buffer.count("```", 0, split_at) % 2:
+            return
+        cls._display_streamed_markdown(cls._stream_buffer[:split_at])
+        cls._stream_buffer = cls._stream_buffer[split_at + 2 :]
+
+    @classmethod
+    def end_stream_message(cls) -> None:
+        """
+        Display rest of a streamed message while the flow continues, e.g. with tool calls. Next streamed message is
+        displayed as a new paragraph and the spinner is shown in the meantime.
+        """
+        cls._display_stream_buffer()
+        cls.start_spinner()
+
+    @classmethod
+    def end_stream(cls) -> bool:
+        """Display rest of the streamed message and reset the stream. Returns whether any message was streamed."""
+        streamed = cls._stream_started
+        cls._display_stream_buffer()
+        cls._stream_started = False
+        cls._stream_rendered = False
+        return streamed
+
+    @classmethod
+    def _display_stream_buffer(cls) -> None:
+        """Display not yet displayed part of the streamed message and clear the buffer."""
+        if cls._stream_buffer.strip():
+            cls._display_streamed_markdown(cls._stream_buffer)
+        cls._stream_buffer = ""
+
+    @classmethod
+    def _display_streamed_markdown(cls, text: str) -> None:
+        """Display part of the streamed message as markdown, parts are separated by an empty line."""
+        console = cls._init_console()
+        with console:
+            if cls._stream_rendered:
+                console.print()
+            console.print(_render_markdown(cls.apply_smart_text_wrap(text)))
+        cls._stream_rendered = True
+
     @staticmethod
     def apply_smart_text_wrap(message: str) -> str:
         """Wraps text according to max_width while preserving list formatting and indentation."""
+        # fast path for short one-line messages
+        if len(message) <= MAX_WIDTH and "\n" not in message:
+            return message
+
         lines = message.split("\n")
-        wrapped_lines = []
-
-        for line in lines:
-            if len(line) <= MAX_WIDTH:
-                wrapped_lines.append(line)
-            else:
-                # Detect list items and their indentation
-                list_match = re.match(r"^(\s*)([-*+]|\d+\.)\s+", line)
-                if list_match:
-                    indent = list_match.group(1)
-                    marker = list_match.group(2)
-                    hanging_indent = len(indent) + len(marker) + 1
-                    wrapped = textwrap.fill(
-                        line, width=MAX_WIDTH, initial_indent="", subsequent_indent=" " * hanging_indent
-                    )
-                else:
-                    leading_space_match = re.match(r"^(\s*)", line)
-                    leading_space = leading_space_match.group(1) if leading_space_match else ""
-                    wrapped = textwrap.fill(line, width=MAX_WIDTH, initial_indent="", subsequent_indent=leading_space)
-                wrapped_lines.append(wrapped)
+        # nothing to wrap, message is returned unchanged
+        if all(len(line) <= MAX_WIDTH for line in lines):
+            return message
+        wrapped_lines = [line if len(line) <= MAX_WIDTH else _wrap_long_line(line) for line in lines]
 
         return "\n".join(wrapped_lines)
 
@@ -261,21 +448,33 @@ class TerminalHandler:
         console = cls._init_console()
         console_width = console.size.width
 
-        # Generate and display logo
-        console.print(get_ascii_art_logo(console_width), end="")
         # Prepare intro message
         intro_message = f"Welcome to the Consul CLI! Consul contains set of simple LLM flows and agents for solving small daily problems. Flow can be selected by starting consul with the '--flow' '-f' flag, available flows are: {', '.join(flows)}. During runtime, following commands can be used. {Commands.get_instructions()}."  # noqa: E501
-        console.print(cls.apply_smart_text_wrap(intro_message), style=cls._main_col)
-        console.print("-" * console_width, style=cls._main_col)
+        # Display logo, intro and separator with a single write
+        console.print(
+            Text.assemble(
+                get_ascii_art_logo(console_width),
+                (cls.apply_smart_text_wrap(intro_message) + "\n", cls._main_col),
+                ("-" * console_width, cls._main_col),
+            )
+        )
 
     @classmethod
     def echo_goodbye(cls) -> None:
         """Display goodbye message."""
+        cls.flush_logs()
         console = cls._init_console()
         console_width = console.size.width
 
-        console.print("\n\nSigning off! Bye ツ!", style=cls._main_col)
         console.print(
-            "Consul code available at https://github.com/ofinke/consul under MIT licence.", style=cls._main_col
+            Text(
+                "\n\nSigning off! Bye ツ!\n"
+                "Consul code available at https://github.com/ofinke/consul under MIT licence.\n"
+                f"{'-' * console_width}",
+                style=cls._main_col,
+            )
         )
-        console.print("-" * console_width, style=cls._main_col)
+
+
+# don't lose queued log messages on interpreter exit
+atexit.register(TerminalHandler.stop_log_listener)
@@ -25,7 +25,8 @@ def consul_user_args(func: Callable[[UserArgs], None]) -> Callable[..., None]:
             msg = "Cannot use both --verbose and --quiet flags"
             raise click.BadParameter(msg)
 
-        args = UserArgs(verbose=verbose, quiet=quiet, flow=flow, message=message)
+        # click already converted the option types, so the model validation can be skipped
+        args = UserArgs.model_construct(verbose=verbose, quiet=quiet, flow=flow, message=message)
         func(args)
 
     return wrapper
@@ -1,6 +1,10 @@
+from operator import attrgetter
+
 from langchain_core.messages import BaseMessage
 from pydantic import BaseModel
 
+_GET_SIDE_AND_TEXT = attrgetter("side", "text")
+
 
 class ChatTurnConfig(BaseModel):
     side: str
@@ -8,7 +12,7 @@ class ChatTurnConfig(BaseModel):
     variables: list[str] | None = None
 
     def dump_tuple(self) -> tuple[str, str]:
-        return (self.side.value, self.text)
+        return _GET_SIDE_AND_TEXT(self)
 
     def dump_to_chatmessage(self) -> BaseMessage:
         raise NotImplementedError
@@ -1,6 +1,7 @@
 from enum import Enum
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import Any
 
 import yaml
 from loguru import logger
@@ -10,6 +11,12 @@ from consul.core.config.base import ChatTurnConfig
 from consul.core.config.tools import AvailableTools
 from consul.core.settings import get_project_root
 
+# libyaml based loader parses configs much faster, pure Python loader is used when the bindings aren't available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 
 class AvailableFlow(Enum):
     CHAT = "chat"
@@ -41,6 +48,11 @@ class BaseFlowConfig(BaseModel):
     # prompts:
     prompt_history: list[ChatTurnConfig]
 
+    @cached_property
+    def llm_kwargs(self) -> dict[str, Any]:
+        """LLM parameters as keyword arguments of the LLM client, dumped only once."""
+        return self.llm_params.model_dump()
+
 
 class BaseAgentConfig(BaseFlowConfig):
     # agent config
@@ -63,8 +75,8 @@ def get_flow_config(task: AvailableFlow) -> BaseFlowConfig:
         path = get_project_root() / "configs" / f"{task.value}.yaml"
         path = path.resolve()
         with Path.open(path, "r", encoding="utf-8") as file:
-            data = yaml.safe_load(file)
-        logger.debug(f"Loaded config for '{task.value}' from YAML file.")
+            data = yaml.load(file, Loader=SafeLoader)
+        logger.debug("Loaded config for '{}' from YAML file.", task.value)
     except FileNotFoundError as e:
         msg = f"Default config for {task.value} not found: {e!s}"
         logger.error(msg)
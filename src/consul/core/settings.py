@@ -1,10 +1,13 @@
+from functools import cache
 from pathlib import Path
 
 from pydantic import BaseModel, Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+@cache
 def get_project_root() -> Path:
+    """Root folder of the project, the path is resolved only once."""
     return Path(__file__).resolve().parents[3]
 
 
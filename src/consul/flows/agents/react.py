@@ -1,5 +1,4 @@
-import json
-
+import orjson
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import ChatMessage, ToolMessage
 from langchain_core.tools import BaseTool
@@ -9,7 +8,7 @@ from loguru import logger
 from consul.core.config.flows import AvailableFlow
 from consul.core.config.prompts import PROMPT_FORMAT_MAPPING
 from consul.core.config.tools import TOOL_MAPPING
-from consul.flows.base import BaseFlow, BaseGraphState
+from consul.flows.base import BaseFlow, BaseFlowOutput, BaseGraphState
 
 
 class ReactAgentFlow(BaseFlow):
@@ -17,6 +16,7 @@ class ReactAgentFlow(BaseFlow):
 
     def __init__(self, flow_name: AvailableFlow) -> None:
         super().__init__(flow_name)
+        self._tools: list[BaseTool] = []
         self._tools_by_name: dict[str, BaseTool] = {}
 
     @property
@@ -28,12 +28,14 @@ class ReactAgentFlow(BaseFlow):
         return BaseGraphState
 
     @property
-    def output_schema(self) -> BaseGraphState:
-        return BaseGraphState
+    def output_schema(self) -> BaseFlowOutput:
+        return BaseFlowOutput
 
     def get_tools(self) -> list[BaseTool]:
-        """Return list of tools available to the agent."""
-        return [TOOL_MAPPING[tool] for tool in self.config.tools]
+        """Return list of tools available to the agent, the list is built once and shared by LLM and graph."""
+        if not self._tools:
+            self._tools = [TOOL_MAPPING[tool] for tool in self.config.tools]
+        return self._tools
 
     def build_system_prompt(self) -> list[ChatMessage]:
         """Builds system prompt from config."""
@@ -54,8 +56,7 @@ class ReactAgentFlow(BaseFlow):
     def build_graph(self) -> StateGraph:
         """Build the agent graph with model and tool nodes."""
         # Setup tools
-        tools = self.get_tools()
-        self._tools_by_name = {tool.name: tool for tool in tools}
+        self._tools_by_name = {tool.name: tool for tool in self.get_tools()}
 
         # Create graph
         graph = StateGraph(self.state_schema)
@@ -65,37 +66,43 @@ class ReactAgentFlow(BaseFlow):
             """Calls LLM with message history and appends LLM response."""
             full_history = [*self._system_prompt, *state.messages]
             response = self._llm.invoke(full_history)
-            return self.state_schema(messages=[*state.messages, response])
+            return self.state_schema.model_construct(messages=[*state.messages, response])
 
         def tool_node(state: BaseGraphState) -> BaseGraphState:
             """Checks if last message contains tool call and executes it."""
-            last_message = state.messages[-1]
-            if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
+            tool_calls = getattr(state.messages[-1], "tool_calls", None)
+            if not tool_calls:
                 return state
 
             tool_outputs = []
-            for tool_call in last_message.tool_calls:
+            for tool_call in tool_calls:
                 logger.debug(
-                    f"Task '{self.config.name}' executing tool call '{tool_call['name']}' with args={str(tool_call['args'])[:25]!r}..."  # noqa: E501
+                    "Task '{}' executing tool call '{}' with args={!r}...",
+                    self.config.name,
+                    tool_call["name"],
+                    str(tool_call["args"])[:25],
                 )
                 tool_result = self._tools_by_name[tool_call["name"]].invoke(tool_call["args"])
                 tool_outputs.append(
                     ToolMessage(
-                        content=json.dumps(tool_result) if not isinstance(tool_result, str) else tool_result,
+                        content=(
+                            orjson.dumps(tool_result, option=orjson.OPT_NON_STR_KEYS).decode()
+                            if not isinstance(tool_result, str)
+                            else tool_result
+                        ),
                         name=tool_call["name"],
                         tool_call_id=tool_call["id"],
                     )
                 )
                 logger.success(f"Tool '{tool_call['name']}' responded with: '{tool_outputs[-1].content[:25]!r}...'")
-            return self.state_schema(messages=[*state.messages, *tool_outputs])
+            return self.state_schema.model_construct(messages=[*state.messages, *tool_outputs])
 
         def should_continue(state: BaseGraphState) -> str:
             """Determine if agent should continue or end."""
             if not state.messages:
                 return "end"
 
-            last_message = state.messages[-1]
-            if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+            if getattr(state.messages[-1], "tool_calls", None):
                 return "continue"
             return "end"
 
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
+from functools import cache
+from typing import Any
 
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import BaseMessage, ChatMessage
+from langchain_core.messages import AIMessageChunk, BaseMessage, ChatMessage
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 from langgraph.graph import StateGraph
 from loguru import logger
@@ -25,6 +27,33 @@ class BaseGraphState(BaseModel):
 class BaseFlowOutput(BaseGraphState):
     """Base output schema - Use this for limit what output is presented to user."""
 
+    new_messages: Sequence[BaseMessage] = []
+
+
+@cache
+def _get_chat_model(llm_name: str, llm_params: tuple[tuple[str, Any], ...]) -> BaseChatModel:
+    """Create LLM client, flows using the same model with the same parameters share one client."""
+    # NOTE: make this better nad move it to utils. Add check on model
+    # first try litellm
+    if "litellm" in settings.model_fields_set:
+        logger.debug("Starting 'litellm' API connection.")
+        return ChatOpenAI(
+            model=llm_name,
+            **settings.litellm.get_credentials(),
+            **dict(llm_params),
+        )
+    # then azure
+    if "azure" in settings.model_fields_set:
+        logger.debug("Starting 'azure' API connection.")
+        return AzureChatOpenAI(
+            model=llm_name,
+            **settings.azure.get_credentials(),
+            **dict(llm_params),
+        )
+    msg = "No supported credentials, couldn't initialize LLM model."
+    logger.error(msg)
+    raise ValueError(msg)
+
 
 class BaseFlow(ABC):
     """Abstract base class for all tasks."""
@@ -81,26 +110,7 @@ class BaseFlow(ABC):
 
     # Common interface
     def get_llm(self) -> BaseChatModel:
-        # NOTE: make this better nad move it to utils. Add check on model
-        # first try litellm
-        if "litellm" in settings.model_fields_set:
-            logger.debug("Starting 'litellm' API connection.")
-            return ChatOpenAI(
-                model=self.config.llm_name,
-                **settings.litellm.get_credentials(),
-                **self.config.llm_params.model_dump(),
-            )
-        # then azure
-        if "azure" in settings.model_fields_set:
-            logger.debug("Starting 'azure' API connection.")
-            return AzureChatOpenAI(
-                model=self.config.llm_name,
-                **settings.azure.get_credentials(),
-                **self.config.llm_params.model_dump(),
-            )
-        msg = "No supported credentials, couldn't initialize LLM model."
-        logger.error(msg)
-        raise ValueError(msg)
+        return _get_chat_model(self.config.llm_name, tuple(self.config.llm_kwargs.items()))
 
     def prepare_to_run(self, input_data: dict[str, any]) -> BaseFlowInput:
         """
@@ -118,33 +128,79 @@ class BaseFlow(ABC):
 
         """
         # Validate input based on input schema
+        # NOTE: debug messages use loguru arguments instead of f-strings, so they are formatted only when emitted
         validated_input = self.input_schema(**input_data)
-        logger.debug(f"Task '{self.config.name}' {validated_input=}")
+        logger.debug("Task '{}' validated_input={!r}", self.config.name, validated_input)
 
         # Build system prompt
         if not self._system_prompt:
             self._system_prompt = self.build_system_prompt()
-            logger.debug(f"Task '{self.config.name}' {self._system_prompt=}")
+            logger.debug("Task '{}' self._system_prompt={!r}", self.config.name, self._system_prompt)
 
         # Get the LLM model
         if not self._llm:
             self._llm = self.get_llm()
-            logger.debug(f"Task '{self.config.name}' {self._llm=}")
+            logger.debug("Task '{}' self._llm={!r}", self.config.name, self._llm)
 
         # Get or build graph
         if not self._compiled_graph:
             self._graph = self.build_graph()
             self._compiled_graph = self._graph.compile()
-            logger.debug(f"Task '{self.config.name}' graph edges: {self._graph.edges}")
-            logger.debug(f"Task '{self.config.name}' graph nodes: {self._graph.nodes}")
+            logger.debug("Task '{}' graph edges: {}", self.config.name, self._graph.edges)
+            logger.debug("Task '{}' graph nodes: {}", self.config.name, self._graph.nodes)
 
         return validated_input
 
-    def execute(self, input_data: dict[str, any]) -> BaseGraphState:
-        """Execute the task with given input."""
+    def execute(self, input_data: dict[str, any]) -> BaseFlowOutput:
+        """Execute the task with given input. Messages appended by the flow are returned in `new_messages`."""
         validated_input = self.prepare_to_run(input_data)
         result = self._compiled_graph.invoke(validated_input)
-        return self.state_schema(**result)
+        return self.output_schema.model_construct(
+            **result, new_messages=result["messages"][len(validated_input.messages) :]
+        )
+
+    def execute_stream(
+        self,
+        input_data: dict[str, any],
+        on_token: Callable[[str], None],
+        on_message_end: Callable[[], None] | None = None,
+    ) -> BaseFlowOutput:
+        """
+        Execute the task with given input while streaming the LLM responses.
+
+        Args:
+            input_data: The raw input data for the task.
+            on_token: Callback receiving text content of LLM responses as it is generated.
+            on_message_end: Callback invoked when a streamed LLM response is finished but the flow continues, either
+                with tool calls or with another LLM response.
+
+        Returns:
+            result: Final output of the flow, same as returned by `execute`.
+
+        """
+        validated_input = self.prepare_to_run(input_data)
+        result = {}
+        streamed_id = None
+        for mode, payload in self._compiled_graph.stream(validated_input, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+                # values are emitted before the next node runs, so the response can be closed before tools are called
+                if streamed_id is not None and getattr(result["messages"][-1], "tool_calls", None):
+                    streamed_id = None
+                    if on_message_end:
+                        on_message_end()
+                continue
+            chunk, _ = payload
+            if not (isinstance(chunk, AIMessageChunk) and chunk.content and isinstance(chunk.content, str)):
+                continue
+            # chunks of a new LLM response carry a different message id
+            if streamed_id not in (None, chunk.id) and on_message_end:
+                on_message_end()
+            streamed_id = chunk.id
+            on_token(chunk.content)
+        return self.output_schema.model_construct(
+            **result, new_messages=result["messages"][len(validated_input.messages) :]
+        )
 
     # TODO: write full async implementation
     # async def aexecute(self, input_data: dict[str, any]) -> BaseGraphState:
@@ -2,7 +2,7 @@ from langchain_core.messages import ChatMessage
 from langgraph.graph import StateGraph
 
 from consul.core.config.prompts import PROMPT_FORMAT_MAPPING
-from consul.flows.base import BaseFlow, BaseGraphState
+from consul.flows.base import BaseFlow, BaseFlowOutput, BaseGraphState
 
 
 class ChatTask(BaseFlow):
@@ -17,8 +17,8 @@ class ChatTask(BaseFlow):
         return BaseGraphState
 
     @property
-    def output_schema(self) -> BaseGraphState:
-        return BaseGraphState
+    def output_schema(self) -> BaseFlowOutput:
+        return BaseFlowOutput
 
     def build_system_prompt(self) -> list[ChatMessage]:
         return [
@@ -36,7 +36,7 @@ class ChatTask(BaseFlow):
         def llm_node(state: BaseGraphState) -> BaseGraphState:
             full_history = [*self._system_prompt, *state.messages]
             response = self._llm.invoke(full_history)
-            return self.state_schema(messages=[*state.messages, response])
+            return self.state_schema.model_construct(messages=[*state.messages, response])
 
         graph.add_node("llm_call", llm_node)
         graph.set_entry_point("llm_call")